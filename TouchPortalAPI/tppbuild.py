@@ -24,7 +24,7 @@ In this example we targed the example_build.py file because that file contains i
 The script command is `tppbuild` when the TouchPortalAPI is installed (via pip or setup), or `tppbuild.py` when run directly from this source.
 
 ```
-<script-command> [-h] <target>
+<script-command> [-h] [--useBuildCache] [--clearBuildCache] [--useEntryCache] <target>
 
 Script to automatically compile a Python plugin into a standalone exe, generate entry.tp, and package them into
 importable tpp file.
@@ -35,7 +35,14 @@ positional arguments:
               on which operating system you're using.
 
 options:
-  -h, --help  show this help message and exit
+  -h, --help       show this help message and exit
+  --useBuildCache  Reuse a previously built .tpp if the plugin sources, additional files and build settings did not change.
+                   Plugin sources are all .py files in the folder tree of PLUGIN_MAIN (except dist, build, hidden and
+                   virtual environment folders). Changes in installed packages are not detected.
+  --clearBuildCache  Remove all previously built .tpp files from the build cache before building.
+  --useEntryCache  Reuse the entry.tp generated by a previous build if the .py entry source and SDK tools did not change.
+                   The entry source is all .py files in the folder tree of PLUGIN_ENTRY (same exclusions as above).
+                   The reused entry.tp is still validated.
 ```
 """
 
@@ -65,12 +72,14 @@ __all__ = ['PLUGIN_MAIN', 'PLUGIN_EXE_NAME', 'PLUGIN_EXE_ICON', 'PLUGIN_ENTRY',
 
 import importlib
 import inspect
+import json
 import os
 import sys
 from argparse import ArgumentParser
 from glob import glob
+from hashlib import sha256
 from pathlib import Path
-from shutil import rmtree
+from shutil import copyfile, rmtree
 from zipfile import ZIP_DEFLATED, ZipFile
 
 try:
@@ -80,11 +89,13 @@ except ImportError:
 	sys.exit(1)
 
 sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
+import sdk_spec
 import sdk_tools
 
 def getInfoFromBuildScript(script:str):
 	try:
-		sys.path.insert(1, os.getcwd()) # This allows build config to import stuff
+		if (cwd := os.getcwd()) not in sys.path:
+			sys.path.insert(1, cwd) # This allows build config to import stuff
 		spec = importlib.util.spec_from_file_location("buildScript", script)
 		buildScript = importlib.util.module_from_spec(spec)
 		spec.loader.exec_module(buildScript)
@@ -92,6 +103,39 @@ def getInfoFromBuildScript(script:str):
 		raise ImportError(f"ERROR while trying to import plugin code from '{script}': {repr(e)}")
 	return buildScript
 
+def entryCacheKey(entry_path, sdk_arg):
+	# The entry script and any python files in its folder tree (eg. shared declarations) can change the generated entry.tp,
+	# as can the SDK tools generating it (eg. after an upgrade) and the platform the entry is generated on.
+	digest = sha256()
+	for src in [entry_path, sdk_tools.__file__, sdk_spec.__file__]:
+		with open(src, "rb") as f:
+			digest.update(f.read())
+	for src in pluginSources(os.path.dirname(os.path.realpath(entry_path))):
+		digest.update(f"{src}:{os.path.getmtime(src)}".encode())
+	digest.update(repr((sdk_arg, sys.platform)).encode())
+	return digest.hexdigest()
+
+def entryCachePath(entry_path):
+	# one cache file per entry script, kept out of the plugin's project folder
+	return os.path.join(ENTRY_CACHE_DIR, sha256(os.path.realpath(entry_path).encode()).hexdigest() + ".json")
+
+def loadEntryCache(cache_path):
+	try:
+		with open(cache_path, "r", encoding="utf-8") as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return {}
+
+def saveEntryCache(cache_path, key, entry_path):
+	try:
+		with open(entry_path, "r", encoding="utf-8") as f:
+			entry_tp = f.read()
+		os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+		with open(cache_path, "w", encoding="utf-8") as f:
+			json.dump({"key": key, "entry_tp": entry_tp}, f)
+	except OSError as e:
+		print(f"Warning could not save entry.tp cache: {e}")
+
 def build_tpp(zip_name, tpp_pack_list):
 	print("Creating archive: " + zip_name)
 	with ZipFile(zip_name, "w", ZIP_DEFLATED) as zf:
@@ -110,7 +154,7 @@ def zip_dir(zf, path, base_path="./", recurse=True):
 			elif recurse and os.path.isdir(src):
 				zip_dir(zf, src, base_path)
 
-def build_distro(opsys, version, pluginname, packingList, output):
+def distro_name(opsys, version, pluginname):
 	if opsys == OS_WIN:
 		os_name = "Windows"
 	elif opsys == OS_MAC:
@@ -121,9 +165,11 @@ def build_distro(opsys, version, pluginname, packingList, output):
 		raise ValueError("Unknown OS")
 	
 	if version:
-		zip_name = pluginname + "_v" + str(version) + "_" + os_name + ".tpp"
-	else:
-		zip_name = pluginname + "_" + os_name + ".tpp"
+		return pluginname + "_v" + str(version) + "_" + os_name + ".tpp"
+	return pluginname + "_" + os_name + ".tpp"
+
+def build_distro(opsys, version, pluginname, packingList, output):
+	zip_name = distro_name(opsys, version, pluginname)
 	print("Creating archive: "+ zip_name)
 	if not os.path.exists(output):
 		os.makedirs(output)
@@ -135,6 +181,48 @@ def build_distro(opsys, version, pluginname, packingList, output):
 				zf.write(src, dest + os.path.basename(src))
 
 	print("")
+	return os.path.join(output, zip_name)
+
+def pluginSources(path):
+	# All python files in the plugin's folder tree (including its own sub-packages), skipping build output,
+	# caches, hidden folders and virtual environments.
+	for root, dirs, files in os.walk(path):
+		dirs[:] = sorted(d for d in dirs if d not in SOURCE_SKIP_DIRS and not d.startswith(".")
+			and not os.path.isfile(os.path.join(root, d, "pyvenv.cfg")))
+		for file in sorted(files):
+			if file.endswith(".py"):
+				yield os.path.join(root, file)
+
+def buildCacheKey(buildfile, entry_tp_path):
+	# Everything which ends up in, or changes, the .tpp file. All python files in PLUGIN_MAIN's folder tree are included
+	# since the plugin most likely imports them, but installed packages are not tracked.
+	digest = sha256()
+	with open(buildfile.PLUGIN_MAIN, "rb") as f:
+		digest.update(f.read())
+	with open(entry_tp_path, "rb") as f:
+		digest.update(f.read())
+	sources = pluginSources(os.path.dirname(os.path.realpath(buildfile.PLUGIN_MAIN)))
+	for src in list(sources) + list(buildfile.ADDITIONAL_FILES) + [buildfile.PLUGIN_ICON, buildfile.PLUGIN_EXE_ICON]:
+		if not src:
+			continue
+		if os.path.isdir(src):
+			# additional folders are packed whole by build_distro(), so every file in them counts
+			files = sorted(os.path.join(root, file) for root, _, names in os.walk(src) for file in names)
+		else:
+			files = [src]
+		for file in files:
+			if os.path.isfile(file):
+				stat = os.stat(file)
+				digest.update(f"{file}:{stat.st_mtime}:{stat.st_size}".encode())
+	digest.update(repr((buildfile.PLUGIN_VERSION, buildfile.PLUGIN_EXE_NAME, buildfile.PLUGIN_ROOT,
+		buildfile.ADDITIONAL_PYINSTALLER_ARGS, sys.platform, sys.version)).encode())
+	return digest.hexdigest()
+
+def pruneBuildCache():
+	# only keep the most recently built packages
+	cached = sorted(glob(os.path.join(BUILD_CACHE_DIR, "*.tpp")), key=os.path.getmtime, reverse=True)
+	for file in cached[BUILD_CACHE_MAX_FILES:]:
+		os.remove(file)
 
 def build_clean(distPath, dirPath=None):
 	print("Cleaning up...")
@@ -157,6 +245,10 @@ def filePath(*file):
 		
 
 EXE_SFX = ".exe" if sys.platform == "win32" else ""
+ENTRY_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".tppbuild", "entry")  # generated entry.tp files by entry script, used with --useEntryCache
+BUILD_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".tppbuild", "cache")  # built .tpp files by buildCacheKey(), used with --useBuildCache
+BUILD_CACHE_MAX_FILES = 10  # older .tpp files are removed from BUILD_CACHE_DIR
+SOURCE_SKIP_DIRS = {"dist", "build", "__pycache__"}  # folders not searched by pluginSources()
 
 OS_WIN = 1
 OS_MAC = 2
@@ -193,6 +285,25 @@ def main(buildArgs=None):
 		'based on which operating system you\'re using.'
 	)
 
+	parser.add_argument(
+		"--useBuildCache", action='store_true', default=False,
+		help='Reuse a previously built .tpp if the plugin sources, additional files and build settings did not change. ' +
+		'Plugin sources are all .py files in the folder tree of PLUGIN_MAIN (except dist, build, hidden and virtual environment folders). ' +
+		'Changes in installed packages are not detected.'
+	)
+
+	parser.add_argument(
+		"--clearBuildCache", action='store_true', default=False,
+		help='Remove all previously built .tpp files from the build cache before building.'
+	)
+
+	parser.add_argument(
+		"--useEntryCache", action='store_true', default=False,
+		help='Reuse the entry.tp generated by a previous build if the .py entry source and SDK tools did not change. ' +
+		'The entry source is all .py files in the folder tree of PLUGIN_ENTRY (except dist, build, hidden and virtual environment folders). ' +
+		'The reused entry.tp is still validated.'
+	)
+
 	opts = parser.parse_args(buildArgs)
 	del parser
 
@@ -202,6 +313,9 @@ def main(buildArgs=None):
 		os.chdir(out_dir)
 
 	print("tppbuild started with target: " + opts.target)
+	if opts.clearBuildCache and os.path.isdir(BUILD_CACHE_DIR):
+		print("Clearing build cache: " + BUILD_CACHE_DIR)
+		rmtree(BUILD_CACHE_DIR)
 	buildfile = getInfoFromBuildScript(os.path.basename(opts.target))
 
 	for attr in requiredVar:
@@ -233,7 +347,8 @@ def main(buildArgs=None):
 	distdir = os.path.join(buildfile.OUTPUT_PATH, 'dist')
 
 	if (entry_abs_path := buildfile.PLUGIN_ENTRY) and os.path.isfile(entry_abs_path):
-		sys.path.append(os.path.dirname(os.path.realpath(entry_abs_path)))
+		if (entry_dir := os.path.dirname(os.path.realpath(entry_abs_path))) not in sys.path:
+			sys.path.append(entry_dir)
 		entry_output_path = os.path.join(distdir, "entry.tp")
 		if buildfile.PLUGIN_ENTRY.endswith(".py"):
 			sdk_arg = [entry_abs_path, f"-i={buildfile.PLUGIN_ENTRY_INDENT}", f"-o={entry_output_path}"]
@@ -242,7 +357,22 @@ def main(buildArgs=None):
 			sdk_arg = [entry_abs_path, "-v"]
 			entry_output_path = buildfile.PLUGIN_ENTRY
 
-		result = sdk_tools.main(sdk_arg)
+		cache_key = None
+		if buildfile.PLUGIN_ENTRY.endswith(".py") and opts.useEntryCache:
+			cache_path = entryCachePath(entry_abs_path)
+			cache_key = entryCacheKey(entry_abs_path, sdk_arg)
+
+		if cache_key and (cached := loadEntryCache(cache_path)).get("key") == cache_key:
+			print("Entry source is unchanged since the last build, using cached entry.tp")
+			with open(entry_output_path, "w", encoding="utf-8") as f:
+				f.write(cached["entry_tp"])
+			# validating the JSON is cheap compared to generating it, and keeps any warnings visible
+			result = sdk_tools.main([entry_output_path, "-v"])
+		else:
+			result = sdk_tools.main(sdk_arg)
+			if result == 0 and cache_key:
+				saveEntryCache(cache_path, cache_key, entry_output_path)
+
 		if result == 0:
 			print("Adding entry.tp to packing list.")
 			TPP_PACK_LIST[entry_output_path] = buildfile.PLUGIN_ROOT + "/"
@@ -260,16 +390,25 @@ def main(buildArgs=None):
 		TPP_PACK_LIST[buildfile.PLUGIN_ICON.split("/")[-1]] = buildfile.PLUGIN_ROOT + "/" \
 			 if len(buildfile.PLUGIN_ICON.split("/")) == 1 else "".join(buildfile.PLUGIN_ICON.split("/")[0:-1])
 
+	if opts.useBuildCache:
+		build_key = buildCacheKey(buildfile, entry_output_path)
+		cached_tpp = os.path.join(BUILD_CACHE_DIR, build_key + ".tpp")
+		if os.path.isfile(cached_tpp):
+			zip_name = distro_name(opsys, buildfile.PLUGIN_VERSION, buildfile.PLUGIN_EXE_NAME)
+			print(f"Nothing changed since the last build, reusing cached {zip_name}")
+			os.makedirs(buildfile.OUTPUT_PATH, exist_ok=True)
+			copyfile(cached_tpp, os.path.join(buildfile.OUTPUT_PATH, zip_name))
+			build_clean(distdir)
+			print("Done!")
+			return 0
+
 	print(f"Compiling {buildfile.PLUGIN_MAIN} for {sys.platform}")
 
 	PI_RUN = [buildfile.PLUGIN_MAIN]
 	PI_RUN.append(f'--distpath={distdir}')
 	PI_RUN.append(f'--onefile')
 	PI_RUN.append("--clean")
-	if (buildfile.PLUGIN_EXE_NAME == ""):
-		PI_RUN.append(f'--name={os.path.splitext(os.path.basename(buildfile.PLUGIN_MAIN))[0]}')
-	else:
-		PI_RUN.append(f'--name={buildfile.PLUGIN_EXE_NAME}')
+	PI_RUN.append(f'--name={buildfile.PLUGIN_EXE_NAME or Path(buildfile.PLUGIN_MAIN).stem}')
 	if buildfile.PLUGIN_EXE_ICON and os.path.isfile(buildfile.PLUGIN_EXE_ICON):
 		PI_RUN.append(f"--icon={Path(buildfile.PLUGIN_EXE_ICON).resolve()}")
 
@@ -288,7 +427,11 @@ def main(buildArgs=None):
 		TPP_PACK_LIST[os.path.basename(file)] = os.path.join(buildfile.PLUGIN_ROOT, os.path.split(file)[0])
 
 	print("Packing everything into tpp file")
-	build_distro(opsys, buildfile.PLUGIN_VERSION, buildfile.PLUGIN_EXE_NAME, TPP_PACK_LIST, buildfile.OUTPUT_PATH)
+	tpp_path = build_distro(opsys, buildfile.PLUGIN_VERSION, buildfile.PLUGIN_EXE_NAME, TPP_PACK_LIST, buildfile.OUTPUT_PATH)
+	if opts.useBuildCache:
+		os.makedirs(BUILD_CACHE_DIR, exist_ok=True)
+		copyfile(tpp_path, cached_tpp)
+		pruneBuildCache()
 
 	build_clean(distdir)
 	print("Done!")
@@ -63,313 +63,346 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
-import importlib
 import os
+import runpy
 import sys
 from argparse import ArgumentParser
-
-sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
-import TpToPy
-from sdk_tools import _validateDefinition, generateDefinitionFromScript, _normPath
-
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from html import escape
+from types import SimpleNamespace
+
+_BADGES_TEMPLATE = (
+    "\n"
+    "![Downloads](https://img.shields.io/github/downloads/{owner}/{repo}/total) \n"
+    "![Forks](https://img.shields.io/github/forks/{owner}/{repo}) \n"
+    "![Stars](https://img.shields.io/github/stars/{owner}/{repo}) \n"
+    "![License](https://img.shields.io/github/license/{owner}/{repo})\n"
+)
+
+# first cells of an action/connector table row, the data and "on hold" cells are appended after it
+_ITEM_ROW_TEMPLATE = "<tr valign='top'><td>{name}</td><td>{doc}</td><td>{format}</td>"
+# removes the `$` from `$[1]` style data placeholders in action/connector formats
+_STRIP_DOLLAR = str.maketrans("", "", "$")
+
+# optional settings table columns: (setting key, column title, skip predicate for values which are set but not shown)
+_SETTING_OPTIONAL_COLUMNS = (
+    ("maxLength", "Max. Length", lambda value: value <= 0),  # a maxLength of 0 means there is no limit
+    ("minValue", "Min. Value", None),
+    ("maxValue", "Max. Value", None),
+)
+
+# feature sections listed in the table of contents: (title, entry attribute, link type)
+_FEATURE_SECTIONS = (
+    ("Actions", "TP_PLUGIN_ACTIONS", "actions"),
+    ("Connectors", "TP_PLUGIN_CONNECTORS", "connectors"),
+    ("States", "TP_PLUGIN_STATES", "states"),
+    ("Events", "TP_PLUGIN_EVENTS", "events"),
+)
+
+# category table header rows
+_ACTION_HEADER = (
+    "<tr valign='buttom'><th>Action Name</th><th>Description</th><th>Format</th>"
+    "<th nowrap>Data<br/><div align=left><sub>choices/default (in bold)</th>"
+    "<th>On<br/>Hold</sub></div></th></tr>\n"
+)
+_CONNECTOR_HEADER = (
+    "<tr valign='buttom'><th>Slider Name</th><th>Description</th><th>Format</th>"
+    "<th nowrap>Data<br/><div align=left><sub>choices/default (in bold)</th></tr>\n"
+)
+_STATE_HEADER = (
+    "\n\n| Id | Description | DefaultValue | parentGroup |\n"
+    "| --- | --- | --- | --- |\n"
+)
+_EVENT_HEADER = (
+    "<tr valign='buttom'><th>Id</th><th>Name</th><th nowrap>Evaluated State Id</th>"
+    "<th>Format</th><th>Type</th><th>Choice(s)</th></tr>\n"
+)
+
+## globals
+g_entry_cache = {}  # (mtime, entry namespace) of loaded entry scripts, keyed by absolute script path
 
 def getInfoFromBuildScript(script:str):
+	script_path = os.path.abspath(script)
 	try:
-		sys.path.insert(1, os.getcwd()) # This allows build config to import stuff
-		spec = importlib.util.spec_from_file_location("entry", script)
-		entry = importlib.util.module_from_spec(spec)
-		spec.loader.exec_module(entry)
+		mtime = os.path.getmtime(script_path)
+		if (cached := g_entry_cache.get(script_path)) and cached[0] == mtime:
+			return cached[1]
+		# This allows build config to import stuff. The script's folder must come before site-packages
+		# (eg. for a vendored TouchPortalAPI), so move it to the front even if it's already in the path.
+		if (script_dir := os.path.dirname(script_path)) in sys.path:
+			sys.path.remove(script_dir)
+		sys.path.insert(1, script_dir)
+		# the script's globals are exposed as attributes, like they would be on an imported module
+		entry = SimpleNamespace(**runpy.run_path(script_path, run_name="entry"))
 	except Exception as e:
 		raise ImportError(f"ERROR while trying to import entry code from '{script}': {repr(e)}")
+	g_entry_cache[script_path] = (mtime, entry)
 	return entry
 
-def generateCategoryLink(linkType, entry, categoryStruct):
-    linkList = []
-    # Ik this is not the most efficient way to do it
-    for category in categoryStruct:
-        for item in entry:
-            if (theItem := entry[item].get('category')) == category:
-                linkName = categoryStruct[theItem].get('name')
-                linkAdress = categoryStruct[theItem].get('id') + linkType
-                if (dataToAppend := f"\n        - [{linkName}](#{linkAdress})") not in linkList:
-                    linkList.append(dataToAppend)
-
-    # print(linkList)
-    return "".join(linkList)
-
-def generateTableContent(entry, entryFile):
-    table_content = f"""
-# {entry['name'].replace(" ", "-")}"""
-    if entry.get('doc') and (repository := entry['doc'].get("repository")) and repository.find(":") != -1:
-        table_content += f"""
-![Downloads](https://img.shields.io/github/downloads/{entry['doc']['repository'].split(":")[0]}/{entry['doc']['repository'].split(":")[1]}/total) 
-![Forks](https://img.shields.io/github/forks/{entry['doc']['repository'].split(":")[0]}/{entry['doc']['repository'].split(":")[1]}) 
-![Stars](https://img.shields.io/github/stars/{entry['doc']['repository'].split(":")[0]}/{entry['doc']['repository'].split(":")[1]}) 
-![License](https://img.shields.io/github/license/{entry['doc']['repository'].split(":")[0]}/{entry['doc']['repository'].split(":")[1]})
-"""
-
-    table_content += f"""
-- [{entry['name']}](#{entry['name'].replace(" ", "-")})
-  - [Description](#description)"""
-    if hasattr(entryFile, "TP_PLUGIN_SETTINGS") and entryFile.TP_PLUGIN_SETTINGS:
-        table_content += """ \n  - [Settings Overview](#Settings-Overview)"""
+def _escapeHtml(value):
+    # user text which ends up inside of the generated html tables
+    return escape(str(value), quote=False)
 
-    table_content += """
-  - [Features](#Features)"""
+def _stripBaseId(itemId, baseid):
+    # str.removeprefix() is only available from Python 3.9
+    return itemId[len(baseid):] if itemId.startswith(baseid) else itemId
 
-    if "TP_PLUGIN_ACTIONS" in dir(entryFile) and entryFile.TP_PLUGIN_ACTIONS:
-        table_content += """\n    - [Actions](#actions)"""
+def _categoryKey(item, categoryStruct):
+    # the category an item is listed under. Items w/out a category, or with an unknown one, use the first category.
+    categoryId = item.get("category", "main")
+    if categoryId in categoryStruct or not categoryStruct:
+        return categoryId
+    return next(iter(categoryStruct))
 
-        table_content += generateCategoryLink("actions", entryFile.TP_PLUGIN_ACTIONS, entryFile.TP_PLUGIN_CATEGORIES)
+def _isSingleCategory(entry, categoryStruct):
+    # stops at the first item which is in a different category than the first one
+    items = iter(entry.values())
+    firstCategory = _categoryKey(next(items, {}), categoryStruct)
+    return all(_categoryKey(item, categoryStruct) == firstCategory for item in items)
 
-    if "TP_PLUGIN_CONNECTORS" in dir(entryFile) and entryFile.TP_PLUGIN_CONNECTORS:
-        table_content += """
-    - [Connectors](#connectors)"""
-        table_content += generateCategoryLink("connectors", entryFile.TP_PLUGIN_CONNECTORS, entryFile.TP_PLUGIN_CATEGORIES)
+def generateCategoryLink(linkType, entry, categoryStruct):
+    # one pass to find which categories are in use, links are then listed in category order
+    usedCategories = {_categoryKey(item, categoryStruct) for item in entry.values()}
+    linkList = []
+    for category, categoryInfo in categoryStruct.items():
+        if category in usedCategories:
+            linkList.append(f"\n        - [{categoryInfo.get('name')}](#{categoryInfo.get('id') + linkType})")
 
-    if "TP_PLUGIN_STATES" in dir(entryFile) and entryFile.TP_PLUGIN_STATES:
-        table_content += """
-    - [States](#states)"""
-        table_content += generateCategoryLink("states", entryFile.TP_PLUGIN_STATES, entryFile.TP_PLUGIN_CATEGORIES)
+    return "".join(linkList)
 
-    if "TP_PLUGIN_EVENTS" in dir(entryFile) and entryFile.TP_PLUGIN_EVENTS:
-        table_content += """
-    - [Events](#events)"""
-        table_content += generateCategoryLink("events", entryFile.TP_PLUGIN_EVENTS, entryFile.TP_PLUGIN_CATEGORIES)
+def generateTableContent(entry, entryFile):
+    nameSlug = entry['name'].replace(" ", "-")
+    table_content = [f"""
+# {nameSlug}"""]
+    repository = (entry.get('doc') or {}).get("repository") or ""
+    if ":" in repository:
+        owner, repo = repository.split(":", 1)
+        table_content.append(_BADGES_TEMPLATE.format(owner=owner, repo=repo))
+
+    table_content.append(f"""
+- [{entry['name']}](#{nameSlug})
+  - [Description](#description)""")
+    if getattr(entryFile, "TP_PLUGIN_SETTINGS", None):
+        table_content.append(""" \n  - [Settings Overview](#Settings-Overview)""")
+
+    table_content.append("""
+  - [Features](#Features)""")
+
+    for title, attrName, linkType in _FEATURE_SECTIONS:
+        if (items := getattr(entryFile, attrName, None)):
+            table_content.append(f"\n    - [{title}](#{linkType})")
+            table_content.append(generateCategoryLink(linkType, items, entryFile.TP_PLUGIN_CATEGORIES))
 
     if entry.get("doc") and entry['doc'].get("Install"):
-        table_content += """
-  - [Installation Guide](#installation)"""
-        
-    table_content += """
+        table_content.append("""
+  - [Installation Guide](#installation)""")
+
+    table_content.append("""
   - [Bugs and Support](#bugs-and-suggestion)
   - [License](#license)
-  """
-    return table_content
+  """)
+    return "".join(table_content)
 
 def typeNumber(entry):
-    typeDoc = ""
-    if entry.get('minValue'):
-        typeDoc += f" &nbsp; <b>Min Value:</b> {entry['minValue']}"
-    else:
-        typeDoc += " &nbsp; <b>Min Value:</b> -2147483648"
-
-    if entry.get('maxValue'):
-        typeDoc += f" &nbsp; <b>Max Value:</b> {entry['maxValue']}"
-    else:
-        typeDoc += f" &nbsp; <b>Max Value:</b> 2147483647"
+    # compare against None so that a limit of 0 is still shown
+    minValue = entry.get('minValue')
+    maxValue = entry.get('maxValue')
+    typeDoc = f" &nbsp; <b>Min Value:</b> {minValue if minValue is not None else -2147483648}" \
+              f" &nbsp; <b>Max Value:</b> {maxValue if maxValue is not None else 2147483647}"
 
-    if entry.get('allowDecimals'):
-        typeDoc += f" &nbsp; <b>Allow Decimals:</b> {entry['allowDecimals']}"
+    if (allowDecimals := entry.get('allowDecimals')):
+        typeDoc += f" &nbsp; <b>Allow Decimals:</b> {allowDecimals}"
 
     return typeDoc
 
-def __generateData(entry):
-    dataDocList = ""
-    needDropdown = False
-    if entry.get('data'):
-        dataDocList += "<td><ol start=1>"
-        if len(entry['data']) > 3:
-            dataDocList = "<td><details><summary><ins>Click to expand</ins></summary><ol start=1>\n"
-            needDropdown = True
-        for data in entry['data']:
-            dataDocList += f"<li>Type: {entry['data'][data]['type']} &nbsp; \n"
-
-            if entry['data'][data]['type'] == "choice" and entry['data'][data].get('valueChoices'):
-                dataDocList += f"Default: <b>{entry['data'][data]['default']}</b> Possible choices: {entry['data'][data]['valueChoices']}"
-            elif "default" in entry['data'][data].keys() and entry['data'][data]['default'] != "":
-                dataDocList += f"Default: <b>{entry['data'][data]['default']}</b>"
-            else:
-                dataDocList += "&lt;empty&gt;"
+def _dataDefaultDoc(data):
+    if (default := data.get('default', "")) != "":
+        return f"Default: <b>{_escapeHtml(default)}</b>"
+    return "&lt;empty&gt;"
+
+def _dataChoiceDoc(data):
+    if (choices := data.get('valueChoices')):
+        return f"Default: <b>{_escapeHtml(data.get('default', ''))}</b> Possible choices: {_escapeHtml(choices)}"
+    return _dataDefaultDoc(data)
+
+def _dataNumberDoc(data):
+    return _dataDefaultDoc(data) + typeNumber(data)
 
-            if entry['data'][data]['type'] == "number":
-                dataDocList += typeNumber(entry['data'][data])
+# data field documentation by data `type`, anything not listed here only shows the default value
+_DATA_DOC_BY_TYPE = {
+    "choice": _dataChoiceDoc,
+    "number": _dataNumberDoc,
+}
 
-            dataDocList += "</li>\n"
-        dataDocList += "</ol></td>\n"
-        if needDropdown:
-            dataDocList += "</details>"
+def __generateData(entry):
+    # returns a list of html fragments which the caller adds to its own list
+    if not entry.get('data'):
+        return ["<td> </td>\n"]
+
+    needDropdown = len(entry['data']) > 3
+    if needDropdown:
+        dataDocList = ["<td><details><summary><ins>Click to expand</ins></summary><ol start=1>\n"]
     else:
-        dataDocList += "<td> </td>\n"
-    
+        dataDocList = ["<td><ol start=1>"]
+    for data in entry['data'].values():
+        dataType = data['type']
+        dataDocList.append(f"<li>Type: {dataType} &nbsp; \n")
+        dataDocList.append(_DATA_DOC_BY_TYPE.get(dataType, _dataDefaultDoc)(data))
+        dataDocList.append("</li>\n")
+    dataDocList.append("</ol></td>\n")
+    if needDropdown:
+        dataDocList.append("</details>")
+
     return dataDocList
 
+def _lookupCategory(categoryId, categoryStruct):
+    # If it does not have a `category` field It will use default
+    return categoryStruct.get(_categoryKey({"category": categoryId}, categoryStruct), {})
+
 def getCategoryName(categoryId, categoryStruct):
-    try:
-        return categoryStruct[categoryId].get('name', categoryId)
-    except IndexError:
-        return categoryStruct[list(categoryStruct.keys())[0]] # If it does not have a `category` field It will use default
+    return _lookupCategory(categoryId, categoryStruct).get('name', categoryId)
 
 def getCategoryId(categoryId, categoryStruct):
-    return categoryStruct.get(categoryId)
+    return _lookupCategory(categoryId, categoryStruct)
 
 def generateAction(entry, categoryStruct):
-    actionDoc = "\n## Actions\n"
-    filterActionbyCategory = {}
-
-    numberOfCategory = [entry[x].get("category", "main") for x in entry]
-    allowDetailOpen = not len(set(numberOfCategory)) > 1
-
-    for action in entry:
-        categoryName = entry[action].get("category", "main")
-        if entry[action]['category'] not in filterActionbyCategory:
-            filterActionbyCategory[categoryName] = "<table>\n"
-            filterActionbyCategory[categoryName] += "<tr valign='buttom'>" + "<th>Action Name</th>" + "<th>Description</th>" + "<th>Format</th>" + \
-                "<th nowrap>Data<br/><div align=left><sub>choices/default (in bold)</th>" + \
-                "<th>On<br/>Hold</sub></div></th>" + \
-                "</tr>\n"
-
-        filterActionbyCategory[categoryName] += f"<tr valign='top'><td>{entry[action]['name']}</td>" + \
-        f"<td>{entry[action]['doc'] if entry[action].get('doc') else ' '}</td>" + \
-        f"<td>{entry[action]['format'].replace('$', '') if entry[action].get('format') else ' '}</td>"
-        filterActionbyCategory[categoryName] += __generateData(entry[action])
-
-        filterActionbyCategory[categoryName] += f"<td align=center>{'Yes' if entry[action].get('hasHoldFunctionality') and entry[action]['hasHoldFunctionality'] else 'No'}</td>\n"
-    
-    for category in filterActionbyCategory:
-        categoryRealName = getCategoryName(categoryId=category, categoryStruct=categoryStruct)
-        categoryLinkAddress = getCategoryId(category, categoryStruct).get("id") + "actions" # to make it unique
-        actionDoc += f"<details {'open' if list(filterActionbyCategory.keys()).index(category) == 0 and allowDetailOpen else ''} id='{categoryLinkAddress}'><summary><b>Category:</b> {categoryRealName} <small><ins>(Click to expand)</ins></small></summary>"
-        actionDoc += filterActionbyCategory[category]
-        actionDoc += "</tr></table></details>\n"
-    
-    actionDoc += "<br>\n"
-    return actionDoc
+    actionDoc = ["\n## Actions\n"]
+    filterActionbyCategory = defaultdict(list)
+
+    allowDetailOpen = _isSingleCategory(entry, categoryStruct)
+
+    for action in entry.values():
+        categoryName = _categoryKey(action, categoryStruct)
+        categoryDoc = filterActionbyCategory[categoryName]
+        if not categoryDoc:
+            categoryDoc.extend(("<table>\n", _ACTION_HEADER))
+        categoryDoc.append(_ITEM_ROW_TEMPLATE.format(
+            name=_escapeHtml(action['name']),
+            doc=_escapeHtml(doc) if (doc := action.get('doc')) else ' ',
+            format=_escapeHtml(actionFormat.translate(_STRIP_DOLLAR)) if (actionFormat := action.get('format')) else ' '))
+        categoryDoc.extend(__generateData(action))
+
+        categoryDoc.append(f"<td align=center>{'Yes' if action.get('hasHoldFunctionality') else 'No'}</td>\n")
+
+    for index, (category, categoryDoc) in enumerate(filterActionbyCategory.items()):
+        categoryRealName = _escapeHtml(getCategoryName(categoryId=category, categoryStruct=categoryStruct))
+        categoryLinkAddress = getCategoryId(category, categoryStruct).get("id", category) + "actions" # to make it unique
+        actionDoc.append(f"<details {'open' if index == 0 and allowDetailOpen else ''} id='{categoryLinkAddress}'><summary><b>Category:</b> {categoryRealName} <small><ins>(Click to expand)</ins></small></summary>")
+        actionDoc.extend(categoryDoc)
+        actionDoc.append("</tr></table></details>\n")
+
+    actionDoc.append("<br>\n")
+    return "".join(actionDoc)
 
 def generateConnectors(entry, categoryStruct):
-    connectorDoc = "\n## Connectors\n"
-    filterConnectorsbyCategory = {}
-
-    numberOfCategory = [entry[x].get("category", "main") for x in entry]
-    allowDetailOpen = not len(set(numberOfCategory)) > 1
-
-    for connector in entry:
-        categoryName = entry[connector].get("category", "main")
-        if entry[connector]['category'] not in filterConnectorsbyCategory:
-            filterConnectorsbyCategory[categoryName] = "<table>\n"
-            filterConnectorsbyCategory[categoryName] += "<tr valign='buttom'>" + "<th>Slider Name</th>" + "<th>Description</th>" + "<th>Format</th>" + \
-                                                        "<th nowrap>Data<br/><div align=left><sub>choices/default (in bold)</th>" + "</tr>\n"
-            
-        filterConnectorsbyCategory[categoryName] += f"<tr valign='top'><td>{entry[connector]['name']}</td>" + \
-        f"<td>{entry[connector]['doc'] if entry[connector].get('doc') else ' '}</td>" + \
-        f"<td>{entry[connector]['format'].replace('$', '') if entry[connector].get('format') else ' '}</td>"
-
-        filterConnectorsbyCategory[categoryName] += __generateData(entry[connector])
-
-    for category in filterConnectorsbyCategory:
-        categoryRealName = getCategoryName(categoryId=category, categoryStruct=categoryStruct)
-        categoryLinkAddress = getCategoryId(category, categoryStruct).get("id") + "connectors"
-        connectorDoc += f"<details {'open' if list(filterConnectorsbyCategory.keys()).index(category) == 0 and allowDetailOpen else ''} id='{categoryLinkAddress}'><summary><b>Category:</b> {categoryRealName} <small><ins>(Click to expand)</ins></small></summary>"
-        connectorDoc += filterConnectorsbyCategory[category]
-        connectorDoc += "</table></details>\n"
-    connectorDoc += "<br>\n"
-
-    return connectorDoc
-    
+    connectorDoc = ["\n## Connectors\n"]
+    filterConnectorsbyCategory = defaultdict(list)
 
+    allowDetailOpen = _isSingleCategory(entry, categoryStruct)
 
-def generateSetting(entry):
-    settingDoc = "\n\n## Settings Overview\n"
-
-    def f(data):
-        return [data.get('maxLength', 0) > 0, data.get('minValue', None), data.get('maxValue', None)]
-
-    for setting in entry.keys():
-        settingDoc += "| Read-only | Type | Default Value"
-        if f(entry[setting])[0]: settingDoc += f" | Max. Length"
-        if f(entry[setting])[1]: settingDoc += f" | Min. Value"
-        if f(entry[setting])[2]: settingDoc += f" | Max. Value"
-        settingDoc += " |\n"
-        settingDoc += "| --- | --- | ---"
-        if f(entry[setting])[0]: settingDoc += f" | ---"
-        if f(entry[setting])[1]: settingDoc += f" | ---"
-        if f(entry[setting])[2]: settingDoc += f" | ---"
-
-        settingDoc += " |\n"
-        settingDoc += f"| {entry[setting].get('readOnly', False)} | {entry[setting]['type']} | {entry[setting]['default']}"
-        if f(entry[setting])[0]: settingDoc += f" | {entry[setting]['maxLength']}"
-        if f(entry[setting])[1]: settingDoc += f" | {entry[setting]['minValue']}"
-        if f(entry[setting])[2]: settingDoc += f" | {entry[setting]['maxValue']}"
-        settingDoc += " |\n\n"
-        if entry[setting].get('doc'):
-            settingDoc += f"{entry[setting]['doc']}\n\n"
-    return settingDoc 
+    for connector in entry.values():
+        categoryName = _categoryKey(connector, categoryStruct)
+        categoryDoc = filterConnectorsbyCategory[categoryName]
+        if not categoryDoc:
+            categoryDoc.extend(("<table>\n", _CONNECTOR_HEADER))
+        categoryDoc.append(_ITEM_ROW_TEMPLATE.format(
+            name=_escapeHtml(connector['name']),
+            doc=_escapeHtml(doc) if (doc := connector.get('doc')) else ' ',
+            format=_escapeHtml(connectorFormat.translate(_STRIP_DOLLAR)) if (connectorFormat := connector.get('format')) else ' '))
 
-def generateState(entry, baseid, categoryStruct):
-    stateDoc = "\n## States\n"
-    filterCategory = {}
-    
-    numberOfCategory = [entry[x].get("category", "main") for x in entry]
-    allowDetailOpen = not len(set(numberOfCategory)) > 1
+        categoryDoc.extend(__generateData(connector))
+
+    for index, (category, categoryDoc) in enumerate(filterConnectorsbyCategory.items()):
+        categoryRealName = _escapeHtml(getCategoryName(categoryId=category, categoryStruct=categoryStruct))
+        categoryLinkAddress = getCategoryId(category, categoryStruct).get("id", category) + "connectors"
+        connectorDoc.append(f"<details {'open' if index == 0 and allowDetailOpen else ''} id='{categoryLinkAddress}'><summary><b>Category:</b> {categoryRealName} <small><ins>(Click to expand)</ins></small></summary>")
+        connectorDoc.extend(categoryDoc)
+        connectorDoc.append("</table></details>\n")
+    connectorDoc.append("<br>\n")
+
+    return "".join(connectorDoc)
 
-    for state in entry:
-        categoryName = entry[state].get("category", "main")
-        state = entry[state]
-        if not categoryName in filterCategory:
-            categoryRealName = getCategoryName(categoryId=state.get('category'), categoryStruct=categoryStruct)
-            categoryLinkAddress = getCategoryId(state.get('category'), categoryStruct).get("id") + "states"
-            filterCategory[categoryName] = ""
-            filterCategory[categoryName] += f"<details{' open' if len(filterCategory) == 1 and allowDetailOpen else ''} id='{categoryLinkAddress}'><summary><b>Category:</b> {categoryRealName} <small><ins>(Click to expand)</ins></small></summary>\n"
-            filterCategory[categoryName] += "\n\n| Id | Description | DefaultValue | parentGroup |\n"
-            filterCategory[categoryName] += "| --- | --- | --- | --- |\n"
+def generateSetting(entry):
+    settingDoc = ["\n\n## Settings Overview\n"]
+
+    for setting in entry.values():
+        # optional columns which are set for this setting
+        columns = [(label, value) for key, label, skip in _SETTING_OPTIONAL_COLUMNS
+                   if (value := setting.get(key)) is not None and not (skip and skip(value))]
+
+        settingDoc.append("| Read-only | Type | Default Value")
+        settingDoc.extend(f" | {label}" for label, _ in columns)
+        settingDoc.append(" |\n| --- | --- | ---")
+        settingDoc.append(" | ---" * len(columns))
+        settingDoc.append(f" |\n| {setting.get('readOnly', False)} | {setting['type']} | {setting['default']}")
+        settingDoc.extend(f" | {value}" for _, value in columns)
+        settingDoc.append(" |\n\n")
+        if setting.get('doc'):
+            settingDoc.append(f"{setting['doc']}\n\n")
+    return "".join(settingDoc)
 
-        filterCategory[categoryName] += f"| {state['id'].split(baseid)[-1]} | {state['desc']} | {state['default']} | {state.get('parentGroup', ' ')} |\n"
+def generateState(entry, baseid, categoryStruct):
+    stateDoc = ["\n## States\n"]
+    filterCategory = defaultdict(list)
 
-    for category in filterCategory:
-        stateDoc += filterCategory[category]
-        stateDoc += "</details>\n\n"
-    stateDoc += "<br>\n"
+    allowDetailOpen = _isSingleCategory(entry, categoryStruct)
 
-    return stateDoc
+    for state in entry.values():
+        categoryName = _categoryKey(state, categoryStruct)
+        categoryDoc = filterCategory[categoryName]
+        if not categoryDoc:
+            categoryDoc.append(_STATE_HEADER)
 
-def generateEvent(entry, baseid, categoryStruct):
-    eventDoc = "\n## Events\n\n"
-    filterCategory = {}
-    numberOfCategory = [entry[x].get("category", "main") for x in entry]
-    allowDetailOpen = not len(set(numberOfCategory)) > 1
-    for event in entry:
-        event = entry[event] # dict looks like {'0': {}, '1': {}}. so when looping It will give `0` etc..
-        needDropdown = False
-
-        categoryName = event.get("category", "main")
-        if not categoryName in filterCategory:
-            categoryRealName = getCategoryName(categoryId=categoryName, categoryStruct=categoryStruct)
-            categoryLinkAddress = getCategoryId(categoryName, categoryStruct).get("id") + "events"
-            filterCategory[categoryName] = ""
-            filterCategory[categoryName] += f"<details{' open' if len(filterCategory) == 1 and allowDetailOpen else ''} id='{categoryLinkAddress}'><summary><b>Category: </b>{categoryRealName} <small><ins>(Click to expand)</ins></small></summary>\n\n"
-            filterCategory[categoryName] += "<table>\n"
-            filterCategory[categoryName] += "<tr valign='buttom'>" + "<th>Id</th>" + "<th>Name</th>" + "<th nowrap>Evaluated State Id</th>" + \
-                                                 "<th>Format</th>" + "<th>Type</th>" + "<th>Choice(s)</th>" + "</tr>\n"
-
-        filterCategory[categoryName] += f"<tr valign='top'><td>{event['id'].split(baseid)[-1]}</td>" + \
-            f"<td>{event.get('name', '')}</td>" + \
-            f"<td>{event.get('valueStateId', '').split(baseid)[-1]}</td>" + \
-            f"<td>{event.get('format', '')}</td>" + \
-            f"<td>{event.get('valueType', '')}</td>" + \
-            "<td>"
-        
-        if len(event.get('valueChoices', [])) > 5:
-            filterCategory[categoryName] += f"<details><summary><ins>detail</ins></summary>\n"
-            needDropdown = True
-
-        filterCategory[categoryName] += f"<ul>"
-        for item in event.get('valueChoices', []):
-            filterCategory[categoryName] += f"<li>{item}</li>"
-        filterCategory[categoryName] += "</ul></td>"
-
-        if needDropdown:
-            filterCategory[categoryName] += "</details>"
-        eventDoc += "<td></tr>\n"
-    
-    for category in filterCategory:
-        eventDoc += filterCategory[category]
-        eventDoc += f"</table></details>\n"
-    eventDoc += "<br>\n"
+        categoryDoc.append(f"| {_stripBaseId(state['id'], baseid)} | {state['desc']} | {state['default']} | {state.get('parentGroup', ' ')} |\n")
 
-    return eventDoc
+    for index, (category, categoryDoc) in enumerate(filterCategory.items()):
+        categoryRealName = _escapeHtml(getCategoryName(categoryId=category, categoryStruct=categoryStruct))
+        categoryLinkAddress = getCategoryId(category, categoryStruct).get("id", category) + "states"
+        stateDoc.append(f"<details{' open' if index == 0 and allowDetailOpen else ''} id='{categoryLinkAddress}'><summary><b>Category:</b> {categoryRealName} <small><ins>(Click to expand)</ins></small></summary>\n")
+        stateDoc.extend(categoryDoc)
+        stateDoc.append("</details>\n\n")
+    stateDoc.append("<br>\n")
 
+    return "".join(stateDoc)
 
-def main(docArg=None):
+def generateEvent(entry, baseid, categoryStruct):
+    eventDoc = ["\n## Events\n\n"]
+    filterCategory = defaultdict(list)
+    allowDetailOpen = _isSingleCategory(entry, categoryStruct)
+    for event in entry.values():
+        categoryName = _categoryKey(event, categoryStruct)
+        categoryDoc = filterCategory[categoryName]
+        if not categoryDoc:
+            categoryDoc.extend(("<table>\n", _EVENT_HEADER))
+
+        choices = event.get('valueChoices', [])
+        choiceList = f"<ul>{''.join(f'<li>{_escapeHtml(item)}</li>' for item in choices)}</ul>"
+        if len(choices) > 5:
+            choiceList = f"<details><summary><ins>detail</ins></summary>\n{choiceList}</details>"
+
+        categoryDoc.append(f"<tr valign='top'><td>{_escapeHtml(_stripBaseId(event['id'], baseid))}</td>" \
+            f"<td>{_escapeHtml(event.get('name', ''))}</td>" \
+            f"<td>{_escapeHtml(_stripBaseId(event.get('valueStateId', ''), baseid))}</td>" \
+            f"<td>{_escapeHtml(event.get('format', ''))}</td>" \
+            f"<td>{_escapeHtml(event.get('valueType', ''))}</td>" \
+            f"<td>{choiceList}</td></tr>\n")
+
+    for index, (category, categoryDoc) in enumerate(filterCategory.items()):
+        categoryRealName = _escapeHtml(getCategoryName(categoryId=category, categoryStruct=categoryStruct))
+        categoryLinkAddress = getCategoryId(category, categoryStruct).get("id", category) + "events"
+        eventDoc.append(f"<details{' open' if index == 0 and allowDetailOpen else ''} id='{categoryLinkAddress}'><summary><b>Category: </b>{categoryRealName} <small><ins>(Click to expand)</ins></small></summary>\n\n")
+        eventDoc.extend(categoryDoc)
+        eventDoc.append("</table></details>\n")
+    eventDoc.append("<br>\n")
+
+    return "".join(eventDoc)
+
+
+@lru_cache(maxsize=1)
+def _argParser():
+    # built once and reused when main() is called repeatedly, eg. from a batch build script
     parser = ArgumentParser(description=
         "Script to automatically generates a documentation for a TouchPortal plugin.")
 
@@ -390,24 +423,35 @@ def main(docArg=None):
         help='Name of generated documentation. Default is "Documentation". You do not need to add the extension.'
     )
 
-    opts = parser.parse_args(docArg)
-    del parser
+    return parser
+
+def main(docArg=None):
+    opts = _argParser().parse_args(docArg)
+
+    # deferred so importing this module as a library does not pull in the sdk tooling or change sys.path
+    if (module_dir := os.path.dirname(os.path.realpath(__file__))) not in sys.path:
+        sys.path.insert(0, module_dir)
+    from sdk_tools import _validateDefinition, generateDefinitionFromModule, _normPath
 
     opts.target = _normPath(opts.target)
     out_dir = os.path.dirname(opts.target)
     targetPathbaseName = os.path.basename(opts.target)
 
-    if out_dir:
-        os.chdir(out_dir)
+    # output is relative to the target's folder. Using full paths avoids changing the process working directory.
+    opts.output = os.path.join(out_dir, opts.output)
 
     entryType = "py" if targetPathbaseName.endswith(".py") else "tp"
-    sys.path.append(os.path.dirname(os.path.realpath(opts.target)))
+    if (target_dir := os.path.dirname(os.path.realpath(opts.target))) not in sys.path:
+        sys.path.append(target_dir)
     
+    # the entry script is only loaded (executed) once, and that module is used for both validation and documentation
+    if entryType == "py": entry = getInfoFromBuildScript(opts.target)
+
     if not opts.ignoreError:
         print("vaildating entry...\n")
-        if  entryType == "tp" and _validateDefinition(targetPathbaseName):
+        if  entryType == "tp" and _validateDefinition(opts.target):
             print(targetPathbaseName, "is vaild file. continue building document.\n")
-        elif entryType == "py" and _validateDefinition(generateDefinitionFromScript(targetPathbaseName), as_str=True):
+        elif entryType == "py" and _validateDefinition(generateDefinitionFromModule(entry), as_str=True):
             print(targetPathbaseName, "is vaild file. continue building document.\n")
         else:
             print("File is invalid. Please above error for more information.")
@@ -415,71 +459,78 @@ def main(docArg=None):
     else:
         print("Ignoring errors, contiune building document.\n")
 
-    if entryType == "py": entry = getInfoFromBuildScript(targetPathbaseName)
-    else: entry = TpToPy.toString(targetPathbaseName)
+    if entryType == "tp":
+        import TpToPy  # only needed for .tp entries
+        entry = TpToPy.toString(opts.target)
 
+    categoryStruct = entry.TP_PLUGIN_CATEGORIES
+    settingsDoc = None
+    featureDocs = []
+
+    # The settings and feature sections do not depend on each other so they are generated concurrently
+    # (in parallel on free-threaded Python builds), and then written out in order as they complete.
+    # Sections are written to the file as soon as they are available instead of building the whole document in memory.
+    # They go to a temporary file first, which only replaces the output once the whole document was generated,
+    # so an error in one of the sections does not leave a truncated documentation file behind.
+    tmpOutput = opts.output + ".tmp"
+    try:
+        with ThreadPoolExecutor(max_workers=5) as executor, open(tmpOutput, "w", encoding="utf-8", buffering=1<<16) as documentation:
+            print("Building table of content\n")
+            documentation.write(generateTableContent(entry.TP_PLUGIN_INFO, entry))
 
-    documentation = """"""
+            if (settings := getattr(entry, "TP_PLUGIN_SETTINGS", None)):
+                print("Generating settings section\n")
+                settingsDoc = executor.submit(generateSetting, settings)
 
-    print("Building table of content\n")
-    tableContent = generateTableContent(entry.TP_PLUGIN_INFO, entry)
-    documentation += tableContent
+            if (actions := getattr(entry, "TP_PLUGIN_ACTIONS", None)):
+                print("Generating action section\n")
+                featureDocs.append(executor.submit(generateAction, actions, categoryStruct))
 
-    documentation += f"""
-# Description
+            if (connectors := getattr(entry, "TP_PLUGIN_CONNECTORS", None)):
+                print("Generating connector section\n")
+                featureDocs.append(executor.submit(generateConnectors, connectors, categoryStruct))
 
-"""
-    if entry.TP_PLUGIN_INFO.get('doc') and entry.TP_PLUGIN_INFO['doc'].get('description'):
-        documentation += f"{entry.TP_PLUGIN_INFO['doc']['description']}\n\n"
-    
-    documentation += f"This documentation generated for {entry.TP_PLUGIN_INFO['name']} V{entry.TP_PLUGIN_INFO['version']} with [Python TouchPortal SDK](https://github.com/KillerBOSS2019/TouchPortal-API)."
-    if entry.TP_PLUGIN_SETTINGS:
-        print("Generating settings section\n")
-        setting = generateSetting(entry.TP_PLUGIN_SETTINGS)
-        documentation += setting
-
-    documentation += "\n# Features\n"
-    categoryStruct = entry.TP_PLUGIN_CATEGORIES
+            if (states := getattr(entry, "TP_PLUGIN_STATES", None)):
+                print("Generating state section\n")
+                featureDocs.append(executor.submit(generateState, states, entry.TP_PLUGIN_INFO['id'], categoryStruct))
 
-    if "TP_PLUGIN_ACTIONS" in dir(entry) and entry.TP_PLUGIN_ACTIONS:
-        print("Generating action section\n")
-        action = generateAction(entry.TP_PLUGIN_ACTIONS, categoryStruct)
-        documentation += action
+            if (events := getattr(entry, "TP_PLUGIN_EVENTS", None)):
+                print("Generating event section\n")
+                featureDocs.append(executor.submit(generateEvent, events, entry.TP_PLUGIN_INFO['id'], categoryStruct))
 
+            documentation.write("""
+# Description
 
-    if "TP_PLUGIN_CONNECTORS" in dir(entry) and entry.TP_PLUGIN_CONNECTORS:
-        print("Generating connector section\n")
-        connector = generateConnectors(entry.TP_PLUGIN_CONNECTORS, categoryStruct)
-        documentation += connector
+""")
+            if entry.TP_PLUGIN_INFO.get('doc') and entry.TP_PLUGIN_INFO['doc'].get('description'):
+                documentation.write(f"{entry.TP_PLUGIN_INFO['doc']['description']}\n\n")
 
-    if "TP_PLUGIN_STATES" in dir(entry) and entry.TP_PLUGIN_STATES:
-        print("Generating state section\n")
-        state = generateState(entry.TP_PLUGIN_STATES, entry.TP_PLUGIN_INFO['id'], categoryStruct)
-        documentation += state
+            documentation.write(f"This documentation generated for {entry.TP_PLUGIN_INFO['name']} V{entry.TP_PLUGIN_INFO['version']} with [Python TouchPortal SDK](https://github.com/KillerBOSS2019/TouchPortal-API).")
+            if settingsDoc:
+                documentation.write(settingsDoc.result())
 
-    if "TP_PLUGIN_EVENTS" in dir(entry) and entry.TP_PLUGIN_EVENTS:
-        print("Generating event section\n")
-        event = generateEvent(entry.TP_PLUGIN_EVENTS, entry.TP_PLUGIN_INFO['id'], categoryStruct)
-        documentation += event
+            documentation.write("\n# Features\n")
+            documentation.writelines(featureDoc.result() for featureDoc in featureDocs)
 
-    if entry.TP_PLUGIN_INFO.get("doc") and entry.TP_PLUGIN_INFO['doc'].get('Install'):
-        print("Found install method. Generating install section\n")
-        documentation += "\n# Installation\n"
-        documentation += entry.TP_PLUGIN_INFO['doc']['Install']
+            if entry.TP_PLUGIN_INFO.get("doc") and entry.TP_PLUGIN_INFO['doc'].get('Install'):
+                print("Found install method. Generating install section\n")
+                documentation.writelines(("\n# Installation\n", entry.TP_PLUGIN_INFO['doc']['Install']))
 
-    print("Generating Bugs and Suggestion section\n")
-    documentation += "\n# Bugs and Suggestion\n"
-    try:
-        documentation += f"Open an [issue](https://github.com/{'/'.join(entry.TP_PLUGIN_INFO['doc']['repository'].split(':'))}/issues) or join offical [TouchPortal Discord](https://discord.gg/MgxQb8r) for support.\n\n"
-    except:
-        documentation += f"Open an issue on github or join offical [TouchPortal Discord](https://discord.gg/MgxQb8r) for support.\n\n"
+            print("Generating Bugs and Suggestion section\n")
+            documentation.write("\n# Bugs and Suggestion\n")
+            if (repository := (entry.TP_PLUGIN_INFO.get('doc') or {}).get('repository')):
+                documentation.write(f"Open an [issue](https://github.com/{repository.replace(':', '/', 1)}/issues) or join offical [TouchPortal Discord](https://discord.gg/MgxQb8r) for support.\n\n")
+            else:
+                documentation.write(f"Open an issue on github or join offical [TouchPortal Discord](https://discord.gg/MgxQb8r) for support.\n\n")
 
-    documentation += "\n# License\n"
-    documentation += "This plugin is licensed under the [GPL 3.0 License] - see the [LICENSE](LICENSE) file for more information.\n\n"
+            documentation.write("\n# License\n"
+                "This plugin is licensed under the [GPL 3.0 License] - see the [LICENSE](LICENSE) file for more information.\n\n")
+    except BaseException:
+        if os.path.exists(tmpOutput):
+            os.remove(tmpOutput)
+        raise
+    os.replace(tmpOutput, opts.output)
 
-    with open(opts.output, "w") as f:
-        f.write(documentation)
-        
     print("Finished generating documentation.")
     return 0
 
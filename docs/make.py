@@ -28,15 +28,20 @@ from TouchPortalAPI import (__version__ as api_version)
 #   r'__version__ = "(.+?)"', (src_dir / "__init__.py").read_text("utf8")
 # ).group(1)
 
-try:    git_version = check_output(["git", "describe", "--tags", "--always", "--abbrev=8"]).strip().decode('ascii')
-except: git_version = ""
+def _footerText():
+    # computed when the docs are built (not when this module is imported)
+    try:    git_version = check_output(["git", "describe", "--tags", "--always", "--abbrev=8"]).strip().decode('ascii')
+    except: git_version = ""
 
-footer_text = (f"Documentation for {mod_name} v{api_version}<br/>"
-               f"generated: {datetime.now(timezone.utc):%Y-%m-%d %H:%M} UTC<br/>")
-if git_version:
-    footer_text += f"git version: <a href='{repo_url}commit/{git_version[-8:]}' class='inline' target='_blank'>{git_version}</a><br/>"
+    footer_text = (f"Documentation for {mod_name} v{api_version}<br/>"
+                   f"generated: {datetime.now(timezone.utc):%Y-%m-%d %H:%M} UTC<br/>")
+    if git_version:
+        footer_text += f"git version: <a href='{repo_url}commit/{git_version[-8:]}' class='inline' target='_blank'>{git_version}</a><br/>"
+    return footer_text
 
-if __name__ == "__main__":
+def build(clean = True):
+    """ Render the docs. Note that pdoc imports the documented modules only once per process, so this should
+    be run in a new process (eg. `python make.py`) to pick up any source changes. """
     env = pdoc.render.env
     env.globals["package_name"] = mod_name
     env.globals["package_version"] = api_version
@@ -45,22 +50,10 @@ if __name__ == "__main__":
     # example = here / ".." / "examples" / "plugin_example.py"
     # env.globals["example_html"] = Markup(pygments.highlight(example.read_text("utf8"), PythonLexer(), HtmlFormatter(style="friendly")))
 
-    # clean up old docs
-    try:
-        if docs_dir != here:
-            if docs_dir.is_dir():
-                shutil.rmtree(docs_dir)
-        else:
-            for f in docs_dir.rglob("*.html"):
-                f.unlink()
-    except OSError as e:
-        print(f"Error trying to remove old docs: {e.strerror}")
-
-    # Render main docs
     pdoc.render.configure(
         template_directory = here,
         docformat = "google",
-        footer_text = footer_text,
+        footer_text = _footerText(),
         edit_url_map={
             mod_name: f"{repo_url}blob/main/{mod_name}/",
             # example: f"{repo_url}blob/main/examples/",
@@ -68,8 +61,25 @@ if __name__ == "__main__":
         # logo="/logo.svg",
         # logo_link = home_url,
     )
+
+    # clean up old docs
+    if clean:
+        try:
+            if docs_dir != here:
+                if docs_dir.is_dir():
+                    shutil.rmtree(docs_dir)
+            else:
+                for f in docs_dir.rglob("*.html"):
+                    f.unlink()
+        except OSError as e:
+            print(f"Error trying to remove old docs: {e.strerror}")
+
+    # Render main docs
     pdoc.pdoc(
         mod_name,
         # example,
         output_directory = docs_dir,
     )
+
+if __name__ == "__main__":
+    build()
@@ -86,9 +86,26 @@ PLUGIN_ICON = r""
 """ This tells tppbuild where you want finished build tpp to be saved at. Default "./" meaning current dir where tppbuild is running from. """
 OUTPUT_PATH = r"./"
 
-""" PLUGIN_VERSION: A version string for the generated .tpp file name. This example reads the `__version__` from the example plugin's code. """
-import plugin_example
-PLUGIN_VERSION = plugin_example.__version__
+""" PLUGIN_VERSION: A version string for the generated .tpp file name. This example reads the `__version__` from the example plugin's code.
+    The version is read from the source text so the plugin's own code (and all its imports) does not need to run just to build it. """
+def _readVersion(pluginFile):
+    import ast, os
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), pluginFile)
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), path)
+    # finds either `__version__ = "1.0"` or `__version__: str = "1.0"`
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets = [node.target]
+        else:
+            continue
+        if any(isinstance(target, ast.Name) and target.id == "__version__" for target in targets):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"Could not find a __version__ = \"...\" line in {path}")
+
+PLUGIN_VERSION = _readVersion(PLUGIN_MAIN)
 
 # Or just set the PLUGIN_VERSION manually.
 # PLUGIN_VERSION = "1.0.0-beta1"
@@ -102,7 +119,10 @@ ADDITIONAL_FILES = []
 Any additional arguments to be passed to Pyinstaller. Optional.
 """
 ADDITIONAL_PYINSTALLER_ARGS = [
-    "--log-level=WARN"
+    "--log-level=WARN",
+    # With PyInstaller 6.0 or newer, bytecode can be optimized like `python -OO`, which strips asserts and docstrings
+    # for a smaller executable that loads a bit faster. Only use this if the plugin (and its dependencies) do not rely on either.
+    # "--optimize=2",
 ]
 
 # validateBuild()
@@ -8,8 +8,8 @@ import sys
 # _or_ be in a folder directly below this plugin file.
 import TouchPortalAPI as TP
 
-# imports below are optional, to provide argument parsing and logging functionality
-from argparse import ArgumentParser
+# import below is optional, to provide logging functionality
+# (argparse is imported in main(), since it is only needed once at startup)
 from TouchPortalAPI.logger import Logger
 
 
@@ -37,10 +37,11 @@ PLUGIN_ID = "tp.plugin.example.python"
 # Basic plugin metadata
 TP_PLUGIN_INFO = {
     'sdk': 3,
-    'version': int(float(__version__) * 100),  # TP only recognizes integer version numbers
+    'version': round(float(__version__) * 100),  # TP only recognizes integer version numbers (round() since eg. float("1.15") * 100 is 114.99999...)
     'name': "Touch Portal Plugin Example",
     'id': PLUGIN_ID,
     # Startup command, with default logging options read from configuration file (see main() for details)
+    # For Linux/MacOS use the 'plugin_start_cmd_linux'/'plugin_start_cmd_mac' keys (SDK v4+) with start.sh, see README.md
     "plugin_start_cmd": "%TP_PLUGIN_FOLDER%TPExamplePlugin\\pluginexample.exe @plugin-example-conf.txt",
     'configuration': {
         'colorDark': "#25274c",
@@ -136,75 +137,90 @@ TP_PLUGIN_EVENTS = {}
 ## End Python SDK declarations
 
 
-# Create the Touch Portal API client.
-try:
-    TPClient = TP.Client(
-        pluginId = PLUGIN_ID,  # required ID of this plugin
-        sleepPeriod = 0.05,    # allow more time than default for other processes
-        autoClose = True,      # automatically disconnect when TP sends "closePlugin" message
-        checkPluginId = True,  # validate destination of messages sent to this plugin
-        maxWorkers = 4,        # run up to 4 event handler threads
-        updateStatesOnBroadcast = False,  # do not spam TP with state updates on every page change
-    )
-except Exception as e:
-    sys.exit(f"Could not create TP Client, exiting. Error was:\n{repr(e)}")
-# TPClient: TP.Client = None  # instance of the TouchPortalAPI Client, created in main()
+# The Touch Portal API client. It is only created in main(), so that importing this
+# module (eg. by the SDK tools to generate entry.tp) does not start up a client.
+TPClient: TP.Client = None
 
 # Crate the (optional) global logger, an instance of `TouchPortalAPI::Logger` helper class.
 # Logging configuration is set up in main().
 g_log = Logger(name = PLUGIN_ID)
 
+# The last settings array received from TP, used to skip re-processing identical updates.
+g_lastSettings = None
+
 # Settings will be sent by TP upon initial connection to the plugin,
 # as well as whenever they change at runtime. This example uses a
 # shared function to handle both cases. See also onConnect() and onSettingUpdate()
 def handleSettings(settings, on_connect=False):
+    global g_lastSettings
+    g_lastSettings = settings
     # the settings array from TP can just be flattened to a single dict,
     # from:
     #   [ {"Setting 1" : "value"}, {"Setting 2" : "value"} ]
     # to:
     #   { "Setting 1" : "value", "Setting 2" : "value" }
-    settings = { list(settings[i])[0] : list(settings[i].values())[0] for i in range(len(settings)) }
+    flattened = {}
+    for setting in settings:
+        flattened.update(setting)
+    settings = flattened
     # now we can just get settings, and their values, by name
     if (value := settings.get(TP_PLUGIN_SETTINGS['example']['name'])) is not None:
         # this example doesn't do anything useful with the setting, just saves it
         TP_PLUGIN_SETTINGS['example']['value'] = value
 
 
+## Action handlers
+
+# IDs used by the action handlers, looked up once here instead of on every action event
+EXAMPLE_TEXT_DATA_ID = TP_PLUGIN_ACTIONS['example']['data']['text']['id']
+EXAMPLE_COLOR_DATA_ID = TP_PLUGIN_ACTIONS['example']['data']['color']['id']
+TEXT_STATE_ID = TP_PLUGIN_STATES['text']['id']
+COLOR_STATE_ID = TP_PLUGIN_STATES['color']['id']
+
+def handleExampleAction(action_data):
+    # set our example State text and color values with the data from this action
+    text = TPClient.getActionDataValue(action_data, EXAMPLE_TEXT_DATA_ID)
+    color = TPClient.getActionDataValue(action_data, EXAMPLE_COLOR_DATA_ID)
+    TPClient.stateUpdate(TEXT_STATE_ID, text)
+    TPClient.stateUpdate(COLOR_STATE_ID, color)
+
+# Maps action IDs to the functions handling them, used by onAction().
+# Add an entry here for each action in TP_PLUGIN_ACTIONS.
+g_actionHandlers = {
+    TP_PLUGIN_ACTIONS['example']['id']: handleExampleAction,
+}
+
+
 ## TP Client event handler callbacks
 
 # Initial connection handler
-@TPClient.on(TP.TYPES.onConnect)
 def onConnect(data):
-    g_log.info(f"Connected to TP v{data.get('tpVersionString', '?')}, plugin v{data.get('pluginVersion', '?')}.")
-    g_log.debug(f"Connection: {data}")
+    g_log.info("Connected to TP v%s, plugin v%s.", data.get('tpVersionString', '?'), data.get('pluginVersion', '?'))
+    # logging arguments are only formatted if the message is actually logged, so the full `data` is not turned into a string unless debugging
+    g_log.debug("Connection: %s", data)
     if settings := data.get('settings'):
         handleSettings(settings, True)
 
 # Settings handler
-@TPClient.on(TP.TYPES.onSettingUpdate)
 def onSettingUpdate(data):
-    g_log.debug(f"Settings: {data}")
-    if (settings := data.get('values')):
+    g_log.debug("Settings: %s", data)
+    # TP may send the same values again (eg. when the settings dialog is saved without changes)
+    if (settings := data.get('values')) and settings != g_lastSettings:
         handleSettings(settings, False)
 
 # Action handler
-@TPClient.on(TP.TYPES.onAction)
 def onAction(data):
-    g_log.debug(f"Action: {data}")
+    g_log.debug("Action: %s", data)
     # check that `data` and `actionId` members exist and save them for later use
     if not (action_data := data.get('data')) or not (aid := data.get('actionId')):
         return
-    if aid == TP_PLUGIN_ACTIONS['example']['id']:
-        # set our example State text and color values with the data from this action
-        text = TPClient.getActionDataValue(action_data, TP_PLUGIN_ACTIONS['example']['data']['text'])
-        color = TPClient.getActionDataValue(action_data, TP_PLUGIN_ACTIONS['example']['data']['color'])
-        TPClient.stateUpdate(TP_PLUGIN_STATES['text']['id'], text)
-        TPClient.stateUpdate(TP_PLUGIN_STATES['color']['id'], color)
+    # find the handler for this action with a single lookup, however many actions the plugin has
+    if (handler := g_actionHandlers.get(aid)):
+        handler(action_data)
     else:
-        g_log.warning("Got unknown action ID: " + aid)
+        g_log.warning("Got unknown action ID: %s", aid)
 
 # Shutdown handler
-@TPClient.on(TP.TYPES.onShutdown)
 def onShutdown(data):
     g_log.info('Received shutdown event from TP Client.')
     # We do not need to disconnect manually because we used `autoClose = True`
@@ -212,11 +228,18 @@ def onShutdown(data):
     # TPClient.disconnect()
 
 # Error handler
-@TPClient.on(TP.TYPES.onError)
 def onError(exc):
-    g_log.error(f'Error in TP Client event handler: {repr(exc)}')
+    g_log.error("Error in TP Client event handler: %r", exc)
     # ... do something ?
 
+# Register the event handlers above with the TP Client, once it has been created in main().
+def registerHandlers():
+    TPClient.on(TP.TYPES.onConnect)(onConnect)
+    TPClient.on(TP.TYPES.onSettingUpdate)(onSettingUpdate)
+    TPClient.on(TP.TYPES.onAction)(onAction)
+    TPClient.on(TP.TYPES.onShutdown)(onShutdown)
+    TPClient.on(TP.TYPES.onError)(onError)
+
 ## main
 
 def main():
@@ -234,6 +257,7 @@ def main():
     # with the `@` prefix. For example: `plugin-example.py @config.txt`
     # The file must contain one valid argument per line, including the `-` or `--` prefixes.
     # See the plugin-example-conf.txt file for an example config file.
+    from argparse import ArgumentParser
     parser = ArgumentParser(fromfile_prefix_chars='@')
     parser.add_argument("-d", action='store_true',
                         help="Use debug logging.")
@@ -266,10 +290,24 @@ def main():
         logFile = None if opts.l.lower() == "none" else opts.l
     # set console logging if -s argument was passed
     if opts.s:
-        if opts.S == "stderr": logStream = sys.stderr
+        if opts.s == "stderr": logStream = sys.stderr
         elif opts.s == "stdout": logStream = sys.stdout
         else: logStream = None
 
+    # Create the Touch Portal API client.
+    try:
+        TPClient = TP.Client(
+            pluginId = PLUGIN_ID,  # required ID of this plugin
+            sleepPeriod = 0.05,    # allow more time than default for other processes
+            autoClose = True,      # automatically disconnect when TP sends "closePlugin" message
+            checkPluginId = True,  # validate destination of messages sent to this plugin
+            maxWorkers = 4,        # run up to 4 event handler threads
+            updateStatesOnBroadcast = False,  # do not spam TP with state updates on every page change
+        )
+    except Exception as e:
+        sys.exit(f"Could not create TP Client, exiting. Error was:\n{repr(e)}")
+    registerHandlers()
+
     # Configure the Client logging based on command line arguments.
     # Since the Client uses the "root" logger by default,
     # this also sets all default logging options for any added child loggers, such as our g_log instance we created earlier.
@@ -278,7 +316,7 @@ def main():
     TPClient.setLogLevel(logLevel)
 
     # ready to go
-    g_log.info(f"Starting {TP_PLUGIN_INFO['name']} v{__version__} on {sys.platform}.")
+    g_log.info("Starting %s v%s on %s.", TP_PLUGIN_INFO['name'], __version__, sys.platform)
 
     try:
         # Connect to Touch Portal desktop application.
@@ -291,16 +329,16 @@ def main():
         # This will catch and report any critical exceptions in the base TPClient code,
         # _not_ exceptions in this plugin's event handlers (use onError(), above, for that).
         from traceback import format_exc
-        g_log.error(f"Exception in TP Client:\n{format_exc()}")
+        g_log.error("Exception in TP Client:\n%s", format_exc())
         ret = -1
     finally:
         # Make sure TP Client is stopped, this will do nothing if it is already disconnected.
         TPClient.disconnect()
 
     # TP disconnected, clean up.
-    del TPClient
+    TPClient = None
 
-    g_log.info(f"{TP_PLUGIN_INFO['name']} stopped.")
+    g_log.info("%s stopped.", TP_PLUGIN_INFO['name'])
     return ret
 
 
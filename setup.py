@@ -1,6 +1,6 @@
 from setuptools import setup  #, find_packages
 from pathlib import Path
-from re import search
+import re
 
 base_path = Path(__file__).parent
 
@@ -8,9 +8,9 @@ repo_url = 'https://github.com/KillerBOSS2019/TouchPortal-API/'
 home_url = repo_url
 docs_url = 'https://KillerBOSS2019.github.io/TouchPortal-API/'
 long_description = (base_path / "README.md").read_text("utf8")
-api_version = search(
-  r'__version__ = "(.+?)"', (base_path / "TouchPortalAPI" / "__init__.py").read_text("utf8")
-).group(1)
+# the version line is plain ASCII, so match it on the raw bytes w/out decoding the whole file
+version_re = re.compile(rb'__version__ = "(.+?)"')
+api_version = version_re.search((base_path / "TouchPortalAPI" / "__init__.py").read_bytes()).group(1).decode()
 
 classifiers = [
   'Development Status :: 5 - Production/Stable',